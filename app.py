@@ -1,8 +1,13 @@
 import streamlit as st
 import requests
+from requests.adapters import HTTPAdapter
+import aiohttp
+import asyncio
+import threading
+import uuid
+import json
 from audio_recorder_streamlit import audio_recorder
 import base64
-from io import BytesIO
 
 # Page config
 st.set_page_config(page_title="AI Voice Bot", page_icon="🎤", layout="wide")
@@ -11,8 +16,8 @@ st.set_page_config(page_title="AI Voice Bot", page_icon="🎤", layout="wide")
 API_URL = "https://voice-assistant-1-55qh.onrender.com"
 
 # Initialize session state
-if "conversation_history" not in st.session_state:
-    st.session_state.conversation_history = []
+if "sid" not in st.session_state:
+    st.session_state.sid = str(uuid.uuid4())  # Keys the server-side history
 if "messages" not in st.session_state:
     st.session_state.messages = []
 if "processing" not in st.session_state:
@@ -20,60 +25,107 @@ if "processing" not in st.session_state:
 if "last_audio_bytes" not in st.session_state:
     st.session_state.last_audio_bytes = None
 
-def speech_to_text(audio_bytes):
-    """Convert speech to text via API"""
-    try:
-        files = {"audio": ("audio.wav", audio_bytes, "audio/wav")}
-        response = requests.post(f"{API_URL}/speech-to-text", files=files, timeout=30)
-        if response.status_code == 200:
-            return response.json()["transcript"]
-        else:
-            st.error(f"Speech-to-text error: {response.text}")
-            return None
-    except Exception as e:
-        st.error(f"Error: {str(e)}")
-        return None
+@st.cache_resource
+def get_event_loop():
+    """Background event loop that survives Streamlit reruns"""
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return loop
 
-def get_ai_response(message):
-    """Get AI response via API"""
-    try:
-        data = {
-            "message": message,
-            "conversation_history": st.session_state.conversation_history[-10:]  # Last 10 messages
-        }
-        response = requests.post(f"{API_URL}/chat", json=data, timeout=30)
-        if response.status_code == 200:
-            return response.json()["response"]
-        else:
-            st.error(f"Chat error: {response.text}")
-            return None
-    except Exception as e:
-        st.error(f"Error: {str(e)}")
-        return None
+@st.cache_resource
+def get_http_session():
+    """One persistent aiohttp session so TCP+TLS setup is paid once, not per call"""
+    async def _create():
+        return aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=16, keepalive_timeout=60),
+            timeout=aiohttp.ClientTimeout(total=30),
+        )
+    return asyncio.run_coroutine_threadsafe(_create(), get_event_loop()).result()
 
-def text_to_speech(text):
-    """Convert text to speech via API"""
-    try:
-        data = {"text": text}
-        response = requests.post(f"{API_URL}/text-to-speech", json=data, timeout=30)
-        if response.status_code == 200:
-            result = response.json()
-            audio_bytes = base64.b64decode(result["audio"])
-            return audio_bytes
-        else:
-            st.error(f"Text-to-speech error: {response.text}")
-            return None
-    except Exception as e:
-        st.error(f"Error: {str(e)}")
+def run_async(coro):
+    """Run a coroutine on the shared background loop and wait for the result"""
+    return asyncio.run_coroutine_threadsafe(coro, get_event_loop()).result()
+
+# Created once, reused across reruns (Streamlit re-executes this script top-to-bottom)
+http_session = get_http_session()
+
+@st.cache_resource
+def get_sync_session():
+    """Pooled requests.Session for the sync call sites, so keep-alive
+    connections amortize TLS handshakes across reruns"""
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+    return session
+
+SESSION = get_sync_session()
+
+def stream_ai_response(message):
+    """Yield AI response tokens from the SSE endpoint as they arrive"""
+    data = {"message": message, "session_id": st.session_state.sid}
+    with SESSION.post(f"{API_URL}/chat/stream", json=data, stream=True, timeout=30) as response:
+        response.raise_for_status()
+        for line in response.iter_lines(decode_unicode=True):
+            if not line or not line.startswith("data: "):
+                continue
+            payload = line[6:]
+            if payload == "[DONE]":
+                break
+            if payload == "[ERROR]":
+                # Server hit an error mid-stream; the turn was not recorded
+                raise RuntimeError("Chat stream failed - see server logs")
+            yield json.loads(payload)
+
+async def clear_remote_history(session_id):
+    """Drop the server-side conversation history for this session"""
+    async with http_session.delete(f"{API_URL}/chat/{session_id}") as response:
+        return response.status == 200
+
+async def text_to_speech(text):
+    """Convert text to speech via API (audio is streamed back, not base64 JSON)"""
+    async with http_session.post(f"{API_URL}/text-to-speech", json={"text": text}) as response:
+        if response.status != 200:
+            raise RuntimeError(f"Text-to-speech error: {await response.text()}")
+        chunks = []
+        async for chunk in response.content.iter_chunked(4096):
+            chunks.append(chunk)
+        return b"".join(chunks)
+
+@st.cache_data(max_entries=256, ttl=3600, show_spinner=False)
+def text_to_speech_cached(text):
+    """Cache synthesized audio so identical replies skip the API call"""
+    return run_async(text_to_speech(text))
+
+async def process_turn(audio_bytes, session_id):
+    """Full voice turn in a single /voice call (STT + chat + TTS server-side)
+
+    Takes the sid as an argument because this runs on the background loop
+    thread, where st.session_state is not available.
+    """
+    # Raw body upload - no multipart boundaries to build or parse
+    headers = {"Content-Type": "audio/wav"}
+    url = f"{API_URL}/voice?session_id={session_id}"
+    async with http_session.post(url, data=audio_bytes, headers=headers) as response:
+        if response.status != 200:
+            raise RuntimeError(f"Voice error: {await response.text()}")
+        result = await response.json()
+        audio_data = base64.b64decode(result["bot_audio"]) if result.get("bot_audio") else None
+        return result.get("user_text"), result.get("bot_text"), audio_data, result.get("audio_mime", "audio/mpeg")
+
+@st.cache_data(ttl=30, show_spinner=False)
+def check_backend():
+    """Ping the backend root endpoint; cached so reruns don't pay a round-trip"""
+    response = SESSION.get(f"{API_URL}/", timeout=5)
+    if response.status_code != 200:
         return None
+    return response.json()
 
-def autoplay_audio(audio_bytes):
+def autoplay_audio(audio_bytes, mime="audio/ogg"):
     """Autoplay audio in Streamlit"""
     try:
         b64 = base64.b64encode(audio_bytes).decode()
         audio_html = f"""
             <audio id="audio_player" autoplay>
-                <source src="data:audio/mp3;base64,{b64}" type="audio/mp3">
+                <source src="data:{mime};base64,{b64}" type="{mime}">
             </audio>
             <script>
                 var audio = document.getElementById('audio_player');
@@ -94,29 +146,31 @@ st.markdown("### Talk to AI - Speak or Type!")
 with st.sidebar:
     st.header("⚙️ Settings")
     st.markdown("---")
-    
+
     st.markdown("**Features:**")
     st.markdown("🎙️ Voice Input")
     st.markdown("💬 Text Chat")
     st.markdown("🔊 Voice Output")
     st.markdown("📝 Conversation History")
-    
+
     st.markdown("---")
-    
+
     if st.button("🗑️ Clear Conversation", use_container_width=True):
-        st.session_state.conversation_history = []
+        try:
+            run_async(clear_remote_history(st.session_state.sid))
+        except Exception:
+            pass  # Server history expires with the session anyway
         st.session_state.messages = []
         st.session_state.processing = False
         st.session_state.last_audio_bytes = None
         st.rerun()
-    
+
     st.markdown("---")
     st.markdown("**Status:**")
     try:
-        response = requests.get(f"{API_URL}/", timeout=5)
-        if response.status_code == 200:
+        data = check_backend()
+        if data is not None:
             st.success("✅ Backend Connected")
-            data = response.json()
             if data.get("deepgram_connected"):
                 st.success("✅ Deepgram Connected")
             if data.get("groq_connected"):
@@ -132,19 +186,38 @@ col1, col2 = st.columns([3, 1])
 
 with col1:
     st.subheader("💬 Conversation")
-    
+
     # Display chat messages
     chat_container = st.container(height=400)
     with chat_container:
-        for msg in st.session_state.messages:
-            with st.chat_message(msg["role"]):
-                st.markdown(msg["content"])
-                if msg["role"] == "assistant" and "audio" in msg:
-                    st.audio(msg["audio"], format="audio/mp3")
+        # Only the newest assistant turn keeps an audio player - older ones are
+        # rarely replayed and each st.audio widget bloats the DOM on every rerun
+        last_audio_idx = None
+        for i in range(len(st.session_state.messages) - 1, -1, -1):
+            msg = st.session_state.messages[i]
+            if msg["role"] == "assistant" and "audio" in msg:
+                last_audio_idx = i
+                break
+
+        # Coalesce consecutive same-role messages into one bubble so long
+        # histories don't materialize a widget per message on every rerun
+        blocks = []
+        for i, msg in enumerate(st.session_state.messages):
+            audio = msg.get("audio") if i == last_audio_idx else None
+            if blocks and blocks[-1][0] == msg["role"] and audio is None and blocks[-1][2] is None:
+                blocks[-1][1].append(msg["content"])
+            else:
+                blocks.append([msg["role"], [msg["content"]], audio, msg.get("mime", "audio/ogg")])
+
+        for role, parts, audio, mime in blocks:
+            with st.chat_message(role):
+                st.markdown("\n\n".join(parts))
+                if audio is not None:
+                    st.audio(audio, format=mime)
 
 with col2:
     st.subheader("🎙️ Voice Input")
-    
+
     # Only show recorder if not processing
     if not st.session_state.processing:
         audio_bytes = audio_recorder(
@@ -164,106 +237,104 @@ if audio_bytes and not st.session_state.processing:
     if st.session_state.last_audio_bytes != audio_bytes:
         st.session_state.last_audio_bytes = audio_bytes
         st.session_state.processing = True
-        
+
         with st.spinner("🎧 Processing voice..."):
-            transcript = speech_to_text(audio_bytes)
-            
-            if transcript and transcript.strip():
-                st.success(f"✅ You said: {transcript}")
-                
-                # Add user message
-                st.session_state.messages.append({"role": "user", "content": transcript})
-                st.session_state.conversation_history.append({"role": "user", "content": transcript})
-                
-                # Get AI response
-                with st.spinner("🤔 Thinking..."):
-                    ai_response = get_ai_response(transcript)
-                    
-                    if ai_response and ai_response.strip():
-                        # Generate speech
-                        with st.spinner("🔊 Generating speech..."):
-                            audio_data = text_to_speech(ai_response)
-                            
-                            if audio_data:
-                                # Add assistant message
-                                st.session_state.messages.append({
-                                    "role": "assistant",
-                                    "content": ai_response,
-                                    "audio": audio_data
-                                })
-                                st.session_state.conversation_history.append({
-                                    "role": "assistant",
-                                    "content": ai_response
-                                })
-                                
-                                st.success("✅ Response generated!")
-                                
-                                # Autoplay the response
-                                autoplay_audio(audio_data)
-                                
-                                # Reset processing state
-                                st.session_state.processing = False
-                                st.rerun()
-                            else:
-                                st.error("Failed to generate speech audio")
-                                st.session_state.processing = False
-                    else:
-                        st.error("Failed to get AI response")
-                        st.session_state.processing = False
-            else:
-                st.warning("No speech detected. Please try again.")
-                st.session_state.processing = False
-                st.session_state.last_audio_bytes = None
+            try:
+                transcript, ai_response, audio_data, audio_mime = run_async(process_turn(audio_bytes, st.session_state.sid))
+            except Exception as e:
+                st.error(f"Error: {str(e)}")
+                transcript = ai_response = audio_data = None
+                audio_mime = "audio/mpeg"
 
-# Text input
-if not st.session_state.processing:
-    user_input = st.chat_input("Or type your message here...")
-else:
-    user_input = None
-    st.info("⏳ Processing voice input... Text input disabled temporarily")
+        if transcript and transcript.strip():
+            st.success(f"✅ You said: {transcript}")
 
-if user_input:
-    st.session_state.processing = True
-    
-    # Add user message
-    st.session_state.messages.append({"role": "user", "content": user_input})
-    st.session_state.conversation_history.append({"role": "user", "content": user_input})
-    
-    # Get AI response
-    with st.spinner("🤔 Thinking..."):
-        ai_response = get_ai_response(user_input)
-        
-        if ai_response and ai_response.strip():
-            # Generate speech
-            with st.spinner("🔊 Generating speech..."):
-                audio_data = text_to_speech(ai_response)
-                
+            # Add user message
+            st.session_state.messages.append({"role": "user", "content": transcript})
+
+            if ai_response and ai_response.strip():
                 if audio_data:
                     # Add assistant message
                     st.session_state.messages.append({
                         "role": "assistant",
                         "content": ai_response,
-                        "audio": audio_data
-                    })
-                    st.session_state.conversation_history.append({
-                        "role": "assistant",
-                        "content": ai_response
+                        "audio": audio_data,
+                        "mime": audio_mime
                     })
-                    
+
                     st.success("✅ Response generated!")
-                    
+
                     # Autoplay the response
-                    autoplay_audio(audio_data)
-                    
+                    autoplay_audio(audio_data, audio_mime)
+
                     # Reset processing state
                     st.session_state.processing = False
                     st.rerun()
                 else:
                     st.error("Failed to generate speech audio")
                     st.session_state.processing = False
+            else:
+                st.error("Failed to get AI response")
+                st.session_state.processing = False
         else:
-            st.error("Failed to get AI response")
+            st.warning("No speech detected. Please try again.")
             st.session_state.processing = False
+            st.session_state.last_audio_bytes = None
+
+# Text input
+if not st.session_state.processing:
+    user_input = st.chat_input("Or type your message here...")
+else:
+    user_input = None
+    st.info("⏳ Processing voice input... Text input disabled temporarily")
+
+if user_input:
+    st.session_state.processing = True
+
+    # Add user message
+    st.session_state.messages.append({"role": "user", "content": user_input})
+
+    # Stream the AI response into the chat as tokens arrive
+    try:
+        with chat_container:
+            with st.chat_message("assistant"):
+                ai_response = st.write_stream(stream_ai_response(user_input))
+    except Exception as e:
+        st.error(f"Error: {str(e)}")
+        ai_response = None
+
+    if ai_response and ai_response.strip():
+        # Generate speech
+        with st.spinner("🔊 Generating speech..."):
+            try:
+                audio_data = text_to_speech_cached(ai_response)
+            except Exception as e:
+                st.error(f"Error: {str(e)}")
+                audio_data = None
+
+            if audio_data:
+                # Add assistant message
+                st.session_state.messages.append({
+                    "role": "assistant",
+                    "content": ai_response,
+                    "audio": audio_data,
+                    "mime": "audio/ogg"
+                })
+
+                st.success("✅ Response generated!")
+
+                # Autoplay the response
+                autoplay_audio(audio_data)
+
+                # Reset processing state
+                st.session_state.processing = False
+                st.rerun()
+            else:
+                st.error("Failed to generate speech audio")
+                st.session_state.processing = False
+    else:
+        st.error("Failed to get AI response")
+        st.session_state.processing = False
 
 # Footer
 st.markdown("---")
@@ -1,13 +1,31 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException
-from fastapi.responses import Response
+from fastapi import FastAPI, Request, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.responses import Response, StreamingResponse, ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from pydantic import BaseModel
 import os
+import re
+import json
+import logging
+import queue
+import time
+from logging.handlers import QueueHandler, QueueListener
 import base64
-import tempfile
+import hashlib
+import wave
+from io import BytesIO
+from collections import OrderedDict, deque
 from dotenv import load_dotenv
-from deepgram import DeepgramClient, PrerecordedOptions, SpeakOptions
-from groq import Groq
+from deepgram import (
+    DeepgramClient,
+    PrerecordedOptions,
+    SpeakOptions,
+    LiveOptions,
+    LiveTranscriptionEvents,
+)
+from groq import AsyncGroq
+import tiktoken
+import webrtcvad
 import uvicorn
 import asyncio
 import httpx
@@ -15,23 +33,172 @@ import httpx
 # Load environment variables
 load_dotenv()
 
+# Buffered logging: records go through an in-memory queue and a background
+# thread does the stdout I/O, so the event loop never blocks on log writes.
+# Set LOG_LEVEL=WARNING in production to silence the per-request info lines.
+_log_queue = queue.Queue(-1)
+_stream_handler = logging.StreamHandler()
+_stream_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+_log_listener = QueueListener(_log_queue, _stream_handler)
+_log_listener.start()
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"), handlers=[QueueHandler(_log_queue)])
+logger = logging.getLogger(__name__)
+
 # Get API keys from environment variables
 DEEPGRAM_API_KEY = os.getenv("DEEPGRAM_API_KEY")
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 
-print(f"🔑 Deepgram Key Loaded: {bool(DEEPGRAM_API_KEY)} (Length: {len(DEEPGRAM_API_KEY) if DEEPGRAM_API_KEY else 0})")
-print(f"🔑 Groq Key Loaded: {bool(GROQ_API_KEY)} (Length: {len(GROQ_API_KEY) if GROQ_API_KEY else 0})")
+logger.info(f"🔑 Deepgram Key Loaded: {bool(DEEPGRAM_API_KEY)} (Length: {len(DEEPGRAM_API_KEY) if DEEPGRAM_API_KEY else 0})")
+logger.info(f"🔑 Groq Key Loaded: {bool(GROQ_API_KEY)} (Length: {len(GROQ_API_KEY) if GROQ_API_KEY else 0})")
 
 if not DEEPGRAM_API_KEY:
     raise RuntimeError("❌ DEEPGRAM_API_KEY not set in .env file!")
 if not GROQ_API_KEY:
     raise RuntimeError("❌ GROQ_API_KEY not set in .env file!")
 
-# Initialize clients
+# Initialize clients (async variants so endpoints never block the event loop)
 dg_client = DeepgramClient(DEEPGRAM_API_KEY)
-groq_client = Groq(api_key=GROQ_API_KEY)
+groq_client = AsyncGroq(api_key=GROQ_API_KEY)
+
+# Sentence boundary for pipelining LLM output into TTS chunk by chunk
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+# Server-side conversation history keyed by session_id, so clients send only
+# {session_id, message} each turn instead of re-uploading the whole history.
+# In-process only: run a single worker unless this moves to a shared store.
+SESSIONS = {}
+SESSION_LOCKS = {}
+SESSION_LAST_USED = {}
+SESSION_TTL = 3600  # Seconds of inactivity before a session's history is dropped
+
+
+def get_session(session_id):
+    """Return (history, lock) for a session, creating them on first use"""
+    now = time.time()
+
+    # Evict idle sessions so the dicts don't grow one UUID at a time forever
+    for sid in [s for s, t in SESSION_LAST_USED.items() if now - t > SESSION_TTL]:
+        SESSIONS.pop(sid, None)
+        SESSION_LOCKS.pop(sid, None)
+        SESSION_LAST_USED.pop(sid, None)
+
+    if session_id not in SESSIONS:
+        SESSIONS[session_id] = deque(maxlen=6)  # Last 6 messages, matches old trim
+        SESSION_LOCKS[session_id] = asyncio.Lock()
+    SESSION_LAST_USED[session_id] = now
+    return SESSIONS[session_id], SESSION_LOCKS[session_id]
+
+
+# Trim history by tokens, not message count - long turns slow Groq's TTFT
+TOKENIZER = tiktoken.get_encoding("cl100k_base")
+HISTORY_TOKEN_BUDGET = 1500
+
+
+def trim_history_by_tokens(history, budget=HISTORY_TOKEN_BUDGET):
+    """Keep the newest messages that fit the token budget, dropping oldest first"""
+    trimmed = []
+    used = 0
+    for msg in reversed(history):
+        used += len(TOKENIZER.encode(msg["content"]))
+        if used > budget:
+            break
+        trimmed.append(msg)
+    trimmed.reverse()
+    return trimmed
+
+
+# Static system prompt - built once instead of per request
+SYSTEM_MSG = {
+    "role": "system",
+    "content": "You are a helpful voice assistant. Give short, direct answers in 2-3 sentences maximum. Never repeat yourself."
+}
+
+
+def trim_silence(audio_bytes, aggressiveness=2, frame_ms=20, padding_frames=5):
+    """Strip leading/trailing silence from a WAV recording before STT
+
+    Smaller uploads to Deepgram mean less transfer time and fewer billable
+    seconds. Falls back to the original bytes if the recording isn't in a
+    format webrtcvad supports (16-bit mono PCM at 8/16/32/48 kHz).
+    """
+    try:
+        with wave.open(BytesIO(audio_bytes), "rb") as wav:
+            channels = wav.getnchannels()
+            sample_width = wav.getsampwidth()
+            sample_rate = wav.getframerate()
+            pcm = wav.readframes(wav.getnframes())
+
+        if channels != 1 or sample_width != 2 or sample_rate not in (8000, 16000, 32000, 48000):
+            return audio_bytes
+
+        vad = webrtcvad.Vad(aggressiveness)
+        frame_bytes = int(sample_rate * frame_ms / 1000) * sample_width
+        frames = [pcm[i:i + frame_bytes] for i in range(0, len(pcm) - frame_bytes + 1, frame_bytes)]
+        speech_frames = [i for i, frame in enumerate(frames) if vad.is_speech(frame, sample_rate)]
+        if not speech_frames:
+            return audio_bytes
+
+        # Keep a few frames of margin so speech onsets aren't clipped
+        start = max(speech_frames[0] - padding_frames, 0) * frame_bytes
+        end = min(speech_frames[-1] + 1 + padding_frames, len(frames)) * frame_bytes
+        trimmed = pcm[start:end]
+
+        out = BytesIO()
+        with wave.open(out, "wb") as wav:
+            wav.setnchannels(channels)
+            wav.setsampwidth(sample_width)
+            wav.setframerate(sample_rate)
+            wav.writeframes(trimmed)
+        logger.info(f"✂️ VAD trimmed audio: {len(audio_bytes)} -> {out.getbuffer().nbytes} bytes")
+        return out.getvalue()
+    except Exception as e:
+        logger.warning(f"⚠️ VAD trim skipped: {str(e)}")
+        return audio_bytes
+
+
+# LRU for synthesized audio - repeated replies (greetings, fallbacks) skip Deepgram
+TTS_CACHE_MAX = 512
+tts_cache = OrderedDict()
+
 
-app = FastAPI(title="Voice Bot API")
+async def synthesize_speech(text, fmt="ogg"):
+    """Synthesize text to audio bytes in memory, with an LRU cache on the text
+
+    fmt="ogg" gives Opus, ~2-3x smaller than MP3 at comparable speech quality
+    and natively decoded by browsers. The /voice pipeline must use fmt="mp3":
+    its per-sentence chunks are byte-concatenated, which is fine for MP3
+    frames but produces a chained Ogg stream that Chrome stops playing after
+    the first link.
+    """
+    key = (f"aura-asteria-en-{fmt}", hashlib.sha1(text.encode("utf-8")).hexdigest())
+    cached = tts_cache.get(key)
+    if cached is not None:
+        tts_cache.move_to_end(key)
+        return cached
+
+    if fmt == "mp3":
+        options = SpeakOptions(
+            model="aura-asteria-en",
+            encoding="mp3",
+        )
+    else:
+        options = SpeakOptions(
+            model="aura-asteria-en",
+            encoding="opus",
+            container="ogg",
+        )
+    response = await dg_client.speak.asyncrest.v("1").stream_memory({"text": text}, options)
+    buffer = response.stream
+    buffer.seek(0)
+    audio_bytes = buffer.read()
+
+    tts_cache[key] = audio_bytes
+    if len(tts_cache) > TTS_CACHE_MAX:
+        tts_cache.popitem(last=False)
+    return audio_bytes
+
+# orjson serializes the large base64 audio strings far faster than stdlib json
+app = FastAPI(title="Voice Bot API", default_response_class=ORJSONResponse)
 
 # CORS middleware
 app.add_middleware(
@@ -42,12 +209,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress JSON bodies (chat responses, base64 audio) over the WAN; small
+# payloads and the already-compressed audio stream are left alone
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
 class TextRequest(BaseModel):
     text: str
 
 class ChatRequest(BaseModel):
     message: str
-    conversation_history: list = []
+    session_id: str = ""
 
 
 # Keep-alive task to prevent server from sleeping
@@ -64,38 +235,38 @@ async def keep_alive():
             async with httpx.AsyncClient(timeout=30.0) as client:
                 response = await client.get(f"{service_url}/health")
                 if response.status_code == 200:
-                    print("💓 Keep-alive ping successful")
+                    logger.info("💓 Keep-alive ping successful")
                 else:
-                    print(f"⚠️ Keep-alive ping returned status {response.status_code}")
+                    logger.warning(f"⚠️ Keep-alive ping returned status {response.status_code}")
         except Exception as e:
-            print(f"⚠️ Keep-alive ping failed: {str(e)}")
+            logger.warning(f"⚠️ Keep-alive ping failed: {str(e)}")
 
 
 @app.on_event("startup")
 async def startup_event():
     """Start background tasks on server startup"""
-    print("🚀 Server starting up...")
-    print(f"🔑 Deepgram API Key: {'✅ Set' if DEEPGRAM_API_KEY else '❌ Missing'}")
-    print(f"🔑 Groq API Key: {'✅ Set' if GROQ_API_KEY else '❌ Missing'}")
+    logger.info("🚀 Server starting up...")
+    logger.info(f"🔑 Deepgram API Key: {'✅ Set' if DEEPGRAM_API_KEY else '❌ Missing'}")
+    logger.info(f"🔑 Groq API Key: {'✅ Set' if GROQ_API_KEY else '❌ Missing'}")
     
     # Test API connections on startup
     try:
         # Test Groq
-        print("🧪 Testing Groq connection...")
-        test_completion = groq_client.chat.completions.create(
+        logger.info("🧪 Testing Groq connection...")
+        test_completion = await groq_client.chat.completions.create(
             model="llama-3.1-8b-instant",
             messages=[{"role": "user", "content": "test"}],
             max_tokens=10,
             timeout=10.0
         )
-        print("✅ Groq API connected successfully")
+        logger.info("✅ Groq API connected successfully")
     except Exception as e:
-        print(f"⚠️ Groq API test failed: {str(e)}")
+        logger.warning(f"⚠️ Groq API test failed: {str(e)}")
     
     # Start keep-alive task
     asyncio.create_task(keep_alive())
-    print("✅ Keep-alive task started")
-    print("🎉 Server startup complete!")
+    logger.info("✅ Keep-alive task started")
+    logger.info("🎉 Server startup complete!")
 
 
 @app.get("/")
@@ -114,11 +285,25 @@ async def health_check():
 
 
 @app.post("/speech-to-text")
-async def speech_to_text_endpoint(audio: UploadFile = File(...)):
-    """Convert speech to text using Deepgram"""
+async def speech_to_text_endpoint(request: Request):
+    """Convert speech to text using Deepgram
+
+    Expects the raw WAV bytes as the request body (Content-Type: audio/wav) -
+    no multipart parsing, no extra buffer copy.
+    """
     try:
-        audio_data = await audio.read()
-        
+        audio_data = await request.body()
+
+        # Sub-4KB blobs (<~125 ms at 16 kHz mono 16-bit) are double-click
+        # artifacts from the recorder - don't pay a Deepgram round-trip
+        if len(audio_data) < 4096:
+            logger.info(f"⏭️ Skipping too-short audio: {len(audio_data)} bytes")
+            return {"transcript": "", "success": True}
+
+        # webrtcvad walks the clip in 20ms frames - CPU-bound, so keep it off
+        # the event loop
+        audio_data = await asyncio.to_thread(trim_silence, audio_data)
+
         # Deepgram SDK v3 options
         options = PrerecordedOptions(
             model="nova-2",
@@ -126,113 +311,219 @@ async def speech_to_text_endpoint(audio: UploadFile = File(...)):
         )
         
         # Transcribe
-        response = dg_client.listen.prerecorded.v("1").transcribe_file(
+        response = await dg_client.listen.asyncrest.v("1").transcribe_file(
             {"buffer": audio_data},
             options
         )
         
         transcript = response.results.channels[0].alternatives[0].transcript
         
-        print(f"✅ Transcribed: {transcript}")
+        logger.info(f"✅ Transcribed: {transcript}")
         return {"transcript": transcript, "success": True}
     
     except Exception as e:
-        print(f"❌ Speech-to-text error: {str(e)}")
+        logger.error(f"❌ Speech-to-text error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
 
+@app.websocket("/listen")
+async def listen_websocket(websocket: WebSocket):
+    """Live speech-to-text: proxy raw PCM chunks to Deepgram's streaming API
+
+    The browser sends 16 kHz mono linear16 chunks over this socket and gets
+    interim/final transcripts back as JSON while the user is still speaking,
+    instead of waiting for the whole recording to upload and transcribe.
+    """
+    await websocket.accept()
+
+    dg_connection = dg_client.listen.asyncwebsocket.v("1")
+
+    async def on_transcript(self, result, **kwargs):
+        transcript = result.channel.alternatives[0].transcript
+        if transcript:
+            await websocket.send_json({
+                "type": "final" if result.is_final else "interim",
+                "transcript": transcript,
+            })
+
+    async def on_utterance_end(self, utterance_end, **kwargs):
+        await websocket.send_json({"type": "utterance_end"})
+
+    dg_connection.on(LiveTranscriptionEvents.Transcript, on_transcript)
+    dg_connection.on(LiveTranscriptionEvents.UtteranceEnd, on_utterance_end)
+
+    options = LiveOptions(
+        model="nova-2",
+        smart_format=True,
+        interim_results=True,
+        utterance_end_ms="1500",
+        encoding="linear16",
+        sample_rate=16000,
+        channels=1,
+    )
+
+    if not await dg_connection.start(options):
+        logger.error("❌ Could not open Deepgram live connection")
+        await websocket.close(code=1011)
+        return
+
+    try:
+        while True:
+            chunk = await websocket.receive_bytes()
+            await dg_connection.send(chunk)
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        logger.error(f"❌ Live transcription error: {str(e)}")
+    finally:
+        await dg_connection.finish()
+
+
 @app.post("/chat")
 async def chat(request: ChatRequest):
     """Get AI response using Groq"""
     try:
-        # Limit conversation history to last 6 messages to prevent repetition
-        recent_history = request.conversation_history[-6:] if len(request.conversation_history) > 6 else request.conversation_history
-        
-        messages = [
-            {"role": "system", "content": "You are a helpful voice assistant. Give short, direct answers in 2-3 sentences maximum. Never repeat yourself."}
-        ]
-        messages.extend(recent_history)
-        messages.append({"role": "user", "content": request.message})
-        
-        print(f"💬 User: {request.message}")
-        print(f"📝 Sending {len(messages)} messages to Groq")
-        
-        # Use faster model and add timeout
-        completion = groq_client.chat.completions.create(
-            model="llama-3.1-8b-instant",  # Faster model
-            messages=messages,
-            temperature=0.7,
-            max_tokens=100,  # Reduced for faster response
-            timeout=20.0  # 20 second timeout
-        )
-        
-        ai_response = completion.choices[0].message.content
-        
-        print(f"🤖 AI: {ai_response}")
+        history, lock = get_session(request.session_id)
+
+        # Per-session lock so concurrent turns can't interleave the history
+        async with lock:
+            messages = [SYSTEM_MSG, *trim_history_by_tokens(history), {"role": "user", "content": request.message}]
+
+            logger.info(f"💬 User: {request.message}")
+            logger.info(f"📝 Sending {len(messages)} messages to Groq")
+
+            # Use faster model and add timeout
+            completion = await groq_client.chat.completions.create(
+                model="llama-3.1-8b-instant",  # Faster model
+                messages=messages,
+                temperature=0.7,
+                max_tokens=100,  # Reduced for faster response
+                timeout=20.0  # 20 second timeout
+            )
+
+            ai_response = completion.choices[0].message.content
+
+            history.append({"role": "user", "content": request.message})
+            history.append({"role": "assistant", "content": ai_response})
+
+        logger.info(f"🤖 AI: {ai_response}")
         return {"response": ai_response, "success": True}
     
     except TimeoutError:
-        print(f"⏱️ Groq API timeout")
+        logger.error(f"⏱️ Groq API timeout")
         raise HTTPException(status_code=504, detail="AI response timed out. Please try again.")
     except Exception as e:
-        print(f"❌ Chat error: {str(e)}")
-        print(f"❌ Error type: {type(e).__name__}")
+        logger.error(f"❌ Chat error: {str(e)}")
+        logger.error(f"❌ Error type: {type(e).__name__}")
         import traceback
-        print(f"❌ Traceback: {traceback.format_exc()}")
+        logger.error(f"❌ Traceback: {traceback.format_exc()}")
         raise HTTPException(status_code=500, detail=f"Chat Error: {str(e)}")
 
 
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """Stream the AI response as SSE tokens so the client can render text
+    as it arrives instead of waiting for the whole completion"""
+    history, lock = get_session(request.session_id)
+
+    async def token_events():
+        try:
+            async with lock:
+                messages = [SYSTEM_MSG, *trim_history_by_tokens(history), {"role": "user", "content": request.message}]
+
+                logger.info(f"💬 User (stream): {request.message}")
+
+                stream = await groq_client.chat.completions.create(
+                    model="llama-3.1-8b-instant",
+                    messages=messages,
+                    temperature=0.7,
+                    max_tokens=100,
+                    timeout=20.0,
+                    stream=True
+                )
+
+                token_parts = []
+                async for chunk in stream:
+                    delta = chunk.choices[0].delta.content or ""
+                    if delta:
+                        token_parts.append(delta)
+                        # JSON-encode so tokens containing newlines survive SSE framing
+                        yield f"data: {json.dumps(delta)}\n\n"
+
+                ai_response = "".join(token_parts)
+                history.append({"role": "user", "content": request.message})
+                history.append({"role": "assistant", "content": ai_response})
+
+            logger.info(f"🤖 AI (stream): {ai_response}")
+            yield "data: [DONE]\n\n"
+        except Exception as e:
+            logger.error(f"❌ Chat stream error: {str(e)}")
+            # The HTTP status is already 200 by now - signal the failure
+            # in-band so the client doesn't treat truncated text as a reply
+            yield "data: [ERROR]\n\n"
+
+    # identity encoding keeps GZipMiddleware from buffering the event stream
+    return StreamingResponse(
+        token_events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "Content-Encoding": "identity"},
+    )
+
+
+@app.delete("/chat/{session_id}")
+async def clear_chat(session_id: str):
+    """Drop the server-side history for a session (Clear Conversation button)"""
+    SESSIONS.pop(session_id, None)
+    SESSION_LOCKS.pop(session_id, None)
+    SESSION_LAST_USED.pop(session_id, None)
+    return {"success": True}
+
+
 @app.post("/text-to-speech")
 async def text_to_speech_endpoint(request: TextRequest):
     """Convert text to speech using Deepgram"""
     try:
-        print(f"🔊 Converting to speech: {request.text[:50]}...")
-        
-        SPEAK_OPTIONS = {"text": request.text}
-        
-        # Use temp file
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as tmp_file:
-            filename = tmp_file.name
-        
-        options = SpeakOptions(
-            model="aura-asteria-en",
+        logger.info(f"🔊 Converting to speech: {request.text[:50]}...")
+
+        audio_bytes = await synthesize_speech(request.text)
+        buffer = BytesIO(audio_bytes)
+
+        logger.info(f"✅ Audio generated: {len(audio_bytes)} bytes")
+
+        # Stream the audio back in chunks so the client can play on first byte.
+        # Opus is already compressed - the identity encoding tells GZipMiddleware
+        # not to recompress it.
+        return StreamingResponse(
+            iter(lambda: buffer.read(4096), b""),
+            media_type="audio/ogg",
+            headers={"Content-Encoding": "identity"},
         )
-        
-        response = dg_client.speak.v("1").save(filename, SPEAK_OPTIONS, options)
-        
-        # Read the generated file
-        with open(filename, "rb") as f:
-            audio_bytes = f.read()
-        
-        # Clean up
-        if os.path.exists(filename):
-            os.remove(filename)
-        
-        print(f"✅ Audio generated: {len(audio_bytes)} bytes")
-        
-        # Return base64 encoded audio
-        audio_base64 = base64.b64encode(audio_bytes).decode('utf-8')
-        
-        return {
-            "audio": audio_base64,
-            "mime_type": "audio/mpeg",
-            "success": True
-        }
-    
+
     except Exception as e:
-        print(f"❌ Text-to-speech error: {str(e)}")
+        logger.error(f"❌ Text-to-speech error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
 
 @app.post("/voice")
-async def voice_bot(file: UploadFile = File(...)):
-    """Complete voice bot pipeline: Speech → Text → AI → Speech"""
+async def voice_bot(request: Request):
+    """Complete voice bot pipeline: Speech → Text → AI → Speech
+
+    Expects the raw WAV bytes as the request body (Content-Type: audio/wav).
+    """
     try:
-        print("🎤 Voice bot request received")
-        
-        # 1. Read uploaded audio
-        audio_bytes = await file.read()
-        print(f"📥 Audio received: {len(audio_bytes)} bytes")
+        logger.info("🎤 Voice bot request received")
+
+        # 1. Read uploaded audio (raw body, no multipart)
+        audio_bytes = await request.body()
+        logger.info(f"📥 Audio received: {len(audio_bytes)} bytes")
+
+        # Same short-circuit as /speech-to-text; the client treats an empty
+        # user_text as "no speech detected"
+        if len(audio_bytes) < 4096:
+            logger.info(f"⏭️ Skipping too-short audio: {len(audio_bytes)} bytes")
+            return {"user_text": "", "bot_text": "", "bot_audio": "", "success": True}
+
+        audio_bytes = await asyncio.to_thread(trim_silence, audio_bytes)
         
         # 2. Speech to Text
         options = PrerecordedOptions(
@@ -240,51 +531,68 @@ async def voice_bot(file: UploadFile = File(...)):
             smart_format=True,
         )
         
-        stt_response = dg_client.listen.prerecorded.v("1").transcribe_file(
+        stt_response = await dg_client.listen.asyncrest.v("1").transcribe_file(
             {"buffer": audio_bytes},
             options
         )
         
         user_text = stt_response.results.channels[0].alternatives[0].transcript
-        print(f"✅ Transcribed: {user_text}")
-        
-        # 3. Get AI response
-        completion = groq_client.chat.completions.create(
-            model="llama-3.1-8b-instant",  # Faster model
-            messages=[
-                {"role": "system", "content": "You are a helpful voice assistant. Give short, direct answers in 2-3 sentences. Never repeat yourself."},
-                {"role": "user", "content": user_text}
-            ],
-            temperature=0.7,
-            max_tokens=100,
-            timeout=20.0
-        )
-        
-        bot_text = completion.choices[0].message.content
-        print(f"🤖 AI Response: {bot_text}")
-        
-        # 4. Text to Speech
-        SPEAK_OPTIONS = {"text": bot_text}
-        
-        # Use temp file
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as tmp_file:
-            filename = tmp_file.name
-        
-        tts_options = SpeakOptions(
-            model="aura-asteria-en",
-        )
-        
-        tts_response = dg_client.speak.v("1").save(filename, SPEAK_OPTIONS, tts_options)
-        
-        # Read the generated file
-        with open(filename, "rb") as f:
-            bot_audio_bytes = f.read()
-        
-        # Clean up
-        if os.path.exists(filename):
-            os.remove(filename)
-        
-        print(f"✅ Audio generated: {len(bot_audio_bytes)} bytes")
+        logger.info(f"✅ Transcribed: {user_text}")
+
+        # 3+4. Stream the AI response and pipeline each finished sentence into
+        # TTS while generation continues, so synthesis overlaps the LLM call.
+        # Voice turns share the same server-side history as /chat.
+        session_id = request.query_params.get("session_id", "")
+        history, lock = get_session(session_id)
+
+        sentence_tasks = []
+        try:
+            async with lock:
+                stream = await groq_client.chat.completions.create(
+                    model="llama-3.1-8b-instant",  # Faster model
+                    messages=[SYSTEM_MSG, *trim_history_by_tokens(history), {"role": "user", "content": user_text}],
+                    temperature=0.7,
+                    max_tokens=100,
+                    timeout=20.0,
+                    stream=True
+                )
+
+                pending_text = ""
+                token_parts = []
+
+                async for chunk in stream:
+                    delta = chunk.choices[0].delta.content or ""
+                    token_parts.append(delta)
+                    pending_text += delta
+                    sentences = SENTENCE_END.split(pending_text)
+                    # Everything before the last split is a complete sentence
+                    for sentence in sentences[:-1]:
+                        if sentence.strip():
+                            sentence_tasks.append(asyncio.create_task(synthesize_speech(sentence, fmt="mp3")))
+                    pending_text = sentences[-1]
+
+                if pending_text.strip():
+                    sentence_tasks.append(asyncio.create_task(synthesize_speech(pending_text, fmt="mp3")))
+
+                bot_text = "".join(token_parts)
+                history.append({"role": "user", "content": user_text})
+                history.append({"role": "assistant", "content": bot_text})
+
+            logger.info(f"🤖 AI Response: {bot_text}")
+
+            # Collect the per-sentence audio chunks in order
+            audio_parts = await asyncio.gather(*sentence_tasks)
+        except Exception:
+            # Don't leave synthesis tasks running behind the 500 - cancel any
+            # outstanding ones and drain them so their exceptions are retrieved
+            for task in sentence_tasks:
+                task.cancel()
+            await asyncio.gather(*sentence_tasks, return_exceptions=True)
+            raise
+
+        bot_audio_bytes = b"".join(audio_parts)
+
+        logger.info(f"✅ Audio generated: {len(bot_audio_bytes)} bytes ({len(audio_parts)} sentence chunks)")
         
         # 5. Return everything
         return {
@@ -296,9 +604,9 @@ async def voice_bot(file: UploadFile = File(...)):
         }
     
     except Exception as e:
-        print(f"❌ Voice bot error: {str(e)}")
+        logger.error(f"❌ Voice bot error: {str(e)}")
         import traceback
-        traceback.print_exc()
+        logger.error(traceback.format_exc())
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
 
@@ -306,19 +614,7 @@ async def voice_bot(file: UploadFile = File(...)):
 async def test_tts():
     """Test endpoint for TTS"""
     try:
-        SPEAK_OPTIONS = {"text": "Hello, this is a test message."}
-        
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as tmp_file:
-            filename = tmp_file.name
-        
-        options = SpeakOptions(model="aura-asteria-en")
-        response = dg_client.speak.v("1").save(filename, SPEAK_OPTIONS, options)
-        
-        with open(filename, "rb") as f:
-            audio = f.read()
-        
-        os.remove(filename)
-        
+        audio = await synthesize_speech("Hello, this is a test message.")
         return {"success": True, "audio_size": len(audio)}
     except Exception as e:
         import traceback
@@ -329,8 +625,8 @@ async def test_tts():
 async def test_groq():
     """Test endpoint for Groq API"""
     try:
-        print("🧪 Testing Groq API...")
-        completion = groq_client.chat.completions.create(
+        logger.info("🧪 Testing Groq API...")
+        completion = await groq_client.chat.completions.create(
             model="llama-3.1-8b-instant",
             messages=[
                 {"role": "user", "content": "Say hello"}
@@ -339,15 +635,29 @@ async def test_groq():
             timeout=10.0
         )
         response_text = completion.choices[0].message.content
-        print(f"✅ Groq test successful: {response_text}")
+        logger.info(f"✅ Groq test successful: {response_text}")
         return {"success": True, "response": response_text}
     except Exception as e:
-        print(f"❌ Groq test failed: {str(e)}")
+        logger.error(f"❌ Groq test failed: {str(e)}")
         import traceback
         return {"success": False, "error": str(e), "traceback": traceback.format_exc()}
 
 
 if __name__ == "__main__":
     port = int(os.getenv("PORT", 8888))
-    print(f"🚀 Starting Voice Bot API on http://0.0.0.0:{port}")
-    uvicorn.run("main:app", host="0.0.0.0", port=port, reload=False)
+    # Default to one worker: conversation history lives in per-process dicts,
+    # so multiple workers would split a session's context between processes.
+    # Raise WEB_CONCURRENCY only once SESSIONS moves to a shared store.
+    workers = int(os.getenv("WEB_CONCURRENCY", 1))
+    logger.info(f"🚀 Starting Voice Bot API on http://0.0.0.0:{port} with {workers} workers")
+    # uvloop + httptools cut per-request loop/parsing overhead vs the defaults;
+    # each worker process re-imports this module so clients are per-worker
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=port,
+        reload=False,
+        loop="uvloop",
+        http="httptools",
+        workers=workers,
+    )